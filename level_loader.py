@@ -0,0 +1,65 @@
+import json
+
+# --- Level Loader ---
+# Runs in a separate process for the game's hot-reload. Parsing a big level
+# holds the interpreter lock for the whole parse, so doing it in the game's
+# own process would freeze the game loop. This module must not import pygame.
+
+loaded_level = None # The grid the game currently has loaded, kept inside the worker process
+
+
+def parse_level(level_text):
+    """Parses level JSON, returning the grid or None if it is half-written or malformed."""
+    try:
+        level_data = json.loads(level_text)
+    except ValueError:
+        return None
+
+    # A level must be a non-empty list of equal-length rows of tile numbers
+    if not isinstance(level_data, list) or not level_data or not isinstance(level_data[0], list):
+        return None
+    row_length = len(level_data[0])
+    for row in level_data:
+        if not isinstance(row, list) or len(row) != row_length:
+            return None
+        if not all(isinstance(tile_value, int) for tile_value in row):
+            return None
+    return level_data
+
+
+def start_watching(level_text):
+    """Sets the grid that later changes are diffed against."""
+    global loaded_level
+    loaded_level = parse_level(level_text) if level_text is not None else None
+
+
+def load_changes(level_file):
+    """Reads the level file and returns what changed since the last successful load.
+
+    Returns None if the file can't be read or isn't a valid level, ('rebuild', grid)
+    if there is nothing to diff against or the grid changed size, and otherwise
+    ('patch', [(x, y, tile_value), ...]) with only the cells that changed.
+    """
+    global loaded_level
+    try:
+        with open(level_file, 'r') as file:
+            level_text = file.read()
+    except OSError:
+        return None
+    new_data = parse_level(level_text)
+    if new_data is None:
+        return None
+
+    if loaded_level is None or len(new_data) != len(loaded_level) or len(new_data[0]) != len(loaded_level[0]):
+        loaded_level = new_data
+        return ('rebuild', new_data)
+
+    changes = []
+    for y, (old_row, new_row) in enumerate(zip(loaded_level, new_data)):
+        if old_row == new_row: # Unchanged rows are compared in one go
+            continue
+        for x, (old_value, new_value) in enumerate(zip(old_row, new_row)):
+            if old_value != new_value:
+                changes.append((x, y, new_value))
+    loaded_level = new_data
+    return ('patch', changes)
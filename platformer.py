@@ -1,9 +1,10 @@
 import pygame
 import json
 import os # Import the os module to check for file existence
-
-# --- Initialization ---
-pygame.init()
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import level_loader
 
 # --- Constants ---
 # Adjust screen width back to not include the UI panel
@@ -12,6 +13,9 @@ SCREEN_HEIGHT = 720
 GRID_SIZE = 40
 FPS = 60
 START_LEVEL = 1 # Change this to start on a different level
+LEVELS_DIR = 'levels' # Same folder the editor saves levels to
+RELOAD_CHECK_INTERVAL = 500 # Milliseconds between checks for an edited level file
+RELOAD_RETRIES = 3 # Times an unchanged file that fails to load is re-read, in case it was half-written
 
 # --- Colors (Copied from editor) ---
 WHITE = (255, 255, 255)
@@ -38,11 +42,6 @@ TILE_COLORS = {
     7: COLOR_5
 }
 
-# --- Game Window ---
-screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-pygame.display.set_caption('Platformer Game')
-clock = pygame.time.Clock()
-
 
 # --- Player Class ---
 class Player:
@@ -100,7 +99,7 @@ class Player:
 
         # --- Collision Detection ---
         self.on_ground = False # Assume not on ground until a collision proves otherwise
-        for tile in world.tile_rects:
+        for tile in world.tile_rects.values():
             # Check for collision in x-direction
             if tile.colliderect(self.rect.x + dx, self.rect.y, self.rect.width, self.rect.height):
                 dx = 0
@@ -147,35 +146,134 @@ class Player:
 class World:
     def __init__(self, level_num):
         """Loads and prepares the level."""
-        self.tile_rects = []
+        self.tile_rects = {} # Collision rects keyed by their (column, row) grid cell
         self.world_data = []
         self.world_pixel_width = 0
         self.world_pixel_height = 0
         
-        level_file = f'level_{level_num}.json'
+        self.level_file = os.path.join(LEVELS_DIR, f'level_{level_num}.json')
+        self.level_mtime = None # Modification time of the loaded level file, used for hot-reload
+        self.next_reload_check = 0
+        self.pending_load = None # Future for a level file that is still being loaded
+        self.pending_mtime = None # Modification time of the file being loaded
+        self.failed_mtime = None # Modification time of the last file that failed to load
+        self.failed_attempts = 0
+
+        # Stat before reading so a save landing mid-read is picked up by the next reload check
         try:
-            with open(level_file, 'r') as file:
-                self.world_data = json.load(file)
-            
-            # Calculate world dimensions
-            if self.world_data:
-                self.world_pixel_height = len(self.world_data) * GRID_SIZE
-                self.world_pixel_width = len(self.world_data[0]) * GRID_SIZE
-            
-            # Create collision rectangles from the loaded data
-            for y, row in enumerate(self.world_data):
-                for x, tile_value in enumerate(row):
-                    if tile_value > 0:
-                        self.tile_rects.append(pygame.Rect(x * GRID_SIZE, y * GRID_SIZE, GRID_SIZE, GRID_SIZE))
+            mtime = os.path.getmtime(self.level_file)
+            with open(self.level_file, 'r') as file:
+                level_text = file.read()
+        except OSError:
+            mtime = None
+            level_text = None
+        level_data = level_loader.parse_level(level_text) if level_text is not None else None
 
-        except FileNotFoundError:
-            print(f"Error: Could not load {level_file}. Make sure you have saved it in the editor.")
+        if level_data is not None:
+            self.world_data = level_data
+            self.level_mtime = mtime
+            self.build_tiles()
+        else:
+            print(f"Error: Could not load {self.level_file}. Make sure you have saved it in the editor.")
             # Create a floor so the player doesn't fall forever
             for i in range(50):
-                self.tile_rects.append(pygame.Rect(i * GRID_SIZE, SCREEN_HEIGHT - GRID_SIZE, GRID_SIZE, GRID_SIZE))
+                self.tile_rects[(i, SCREEN_HEIGHT // GRID_SIZE - 1)] = pygame.Rect(i * GRID_SIZE, SCREEN_HEIGHT - GRID_SIZE, GRID_SIZE, GRID_SIZE)
             self.world_pixel_width = 50 * GRID_SIZE
             self.world_pixel_height = SCREEN_HEIGHT
+            if mtime is not None:
+                # The file exists but isn't a valid level, so don't re-read it until it changes
+                self.failed_mtime = mtime
+                self.failed_attempts = RELOAD_RETRIES
+
+        # Edited levels are parsed and diffed in a separate process so a big level
+        # doesn't freeze the game loop. The worker keeps its own copy of the grid
+        # and sends back only the cells that changed.
+        self.loader = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn'))
+        self.loader.submit(level_loader.start_watching, level_text if level_data is not None else None)
+
+    def build_tiles(self):
+        """Rebuilds the world dimensions and every collision rect from world_data."""
+        self.tile_rects = {}
+        self.world_pixel_width = 0
+        self.world_pixel_height = 0
+
+        # Calculate world dimensions
+        if self.world_data:
+            self.world_pixel_height = len(self.world_data) * GRID_SIZE
+            self.world_pixel_width = len(self.world_data[0]) * GRID_SIZE
+        
+        # Create collision rectangles from the loaded data
+        for y, row in enumerate(self.world_data):
+            for x, tile_value in enumerate(row):
+                if tile_value > 0:
+                    self.tile_rects[(x, y)] = pygame.Rect(x * GRID_SIZE, y * GRID_SIZE, GRID_SIZE, GRID_SIZE)
+
+    def patch_tiles(self, changes):
+        """Applies a list of changed (x, y, tile_value) cells to the grid and collision rects."""
+        for x, y, tile_value in changes:
+            self.world_data[y][x] = tile_value
+            if tile_value > 0:
+                if (x, y) not in self.tile_rects:
+                    self.tile_rects[(x, y)] = pygame.Rect(x * GRID_SIZE, y * GRID_SIZE, GRID_SIZE, GRID_SIZE)
+            else:
+                self.tile_rects.pop((x, y), None)
+
+    def check_reload(self):
+        """Reloads the level if its file has changed on disk since it was loaded."""
+        if self.loader is None:
+            return # Hot-reload was turned off after the loader process stopped
+
+        if self.pending_load is not None:
+            if not self.pending_load.done():
+                return
+            try:
+                result = self.pending_load.result()
+            except BrokenProcessPool:
+                print("Warning: The level loader stopped, so levels will no longer hot-reload.")
+                self.loader = None
+                self.pending_load = None
+                return
+            self.pending_load = None
 
+            if result is None:
+                # The editor may still be writing the file, so retry a few times before giving up on it
+                if self.pending_mtime == self.failed_mtime:
+                    self.failed_attempts += 1
+                else:
+                    self.failed_mtime = self.pending_mtime
+                    self.failed_attempts = 1
+                if self.failed_attempts == RELOAD_RETRIES:
+                    print(f"Warning: {self.level_file} is not a valid level. Keeping the current one until it is saved again.")
+                return
+
+            kind, level_change = result
+            if kind == 'rebuild':
+                # Nothing to diff against (fallback floor) or the grid changed size
+                self.world_data = level_change
+                self.build_tiles()
+            else:
+                self.patch_tiles(level_change)
+            self.level_mtime = self.pending_mtime
+            self.failed_mtime = None
+            print(f"Reloaded {self.level_file}.")
+            return
+
+        now = pygame.time.get_ticks()
+        if now < self.next_reload_check:
+            return
+        self.next_reload_check = now + RELOAD_CHECK_INTERVAL
+
+        try:
+            mtime = os.path.getmtime(self.level_file)
+        except OSError:
+            return # File missing, keep playing the level we have
+        if mtime == self.level_mtime:
+            return
+        if mtime == self.failed_mtime and self.failed_attempts >= RELOAD_RETRIES:
+            return
+
+        self.pending_mtime = mtime
+        self.pending_load = self.loader.submit(level_loader.load_changes, self.level_file)
 
     def draw(self, surface, camera_offset):
         """Draws the world tiles relative to the camera."""
@@ -191,6 +289,13 @@ class World:
 
 def main():
     """Main game function."""
+    # --- Initialization ---
+    # Done here rather than at import so the level loader process doesn't open a window
+    pygame.init()
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    pygame.display.set_caption('Platformer Game')
+    clock = pygame.time.Clock()
+
     # --- Setup ---
     world = World(START_LEVEL)
     player = Player(100, SCREEN_HEIGHT - 200)
@@ -205,6 +310,7 @@ def main():
                 run = False
 
         # --- Update ---
+        world.check_reload() # Hot-reload the level if it was saved in the editor
         player.update(world)
 
         # --- Camera Follow with Dead Zone ---
@@ -249,6 +355,8 @@ def main():
         clock.tick(FPS)
 
     # --- Quit ---
+    if world.loader is not None:
+        world.loader.shutdown(wait=False, cancel_futures=True)
     pygame.quit()
 
 
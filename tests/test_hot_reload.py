@@ -0,0 +1,163 @@
+import json
+import os
+import sys
+import time
+import types
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+try:
+    import pygame
+except ImportError:
+    # Only Rect and time.get_ticks are used outside main(), so a small stand-in is enough to run these checks without pygame
+    pygame = types.ModuleType('pygame')
+    pygame.Rect = lambda *args: args
+    pygame.time = types.SimpleNamespace(get_ticks=lambda: int(time.monotonic() * 1000))
+    sys.modules['pygame'] = pygame
+
+import level_loader
+import platformer
+
+ROWS = 500
+COLUMNS = 2000
+
+
+def write_level(level_data, mtime):
+    """Saves a level the way the editor does and gives it a known modification time."""
+    level_file = os.path.join(platformer.LEVELS_DIR, f'level_{platformer.START_LEVEL}.json')
+    with open(level_file, 'w') as f:
+        json.dump(level_data, f)
+    os.utime(level_file, (mtime, mtime))
+
+
+def write_text(text, mtime):
+    level_file = os.path.join(platformer.LEVELS_DIR, f'level_{platformer.START_LEVEL}.json')
+    with open(level_file, 'w') as f:
+        f.write(text)
+    os.utime(level_file, (mtime, mtime))
+
+
+def run_frames(world, until, timeout=30):
+    """Runs check_reload once per simulated frame until `until()` holds, returning the longest frame in ms."""
+    longest = 0
+    deadline = time.perf_counter() + timeout
+    while not until():
+        assert time.perf_counter() < deadline, 'level did not reload'
+        start = time.perf_counter()
+        world.next_reload_check = 0 # Check every frame instead of every RELOAD_CHECK_INTERVAL
+        world.check_reload()
+        sum(range(2000)) # Stand-in for the rest of the frame's Python work
+        longest = max(longest, time.perf_counter() - start)
+        time.sleep(0.001)
+    return longest * 1000
+
+
+def make_world(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs(platformer.LEVELS_DIR, exist_ok=True)
+    return lambda: platformer.World(platformer.START_LEVEL)
+
+
+def test_load_changes_reports_only_changed_cells(tmp_path):
+    level_file = tmp_path / 'level.json'
+    level_data = [[0] * 4 for _ in range(3)]
+    level_loader.start_watching(json.dumps(level_data))
+
+    level_data[1][2] = 5
+    level_file.write_text(json.dumps(level_data))
+    assert level_loader.load_changes(str(level_file)) == ('patch', [(2, 1, 5)])
+
+    level_file.write_text(json.dumps([[0] * 5 for _ in range(3)]))
+    kind, _ = level_loader.load_changes(str(level_file))
+    assert kind == 'rebuild'
+
+
+def test_load_changes_rejects_malformed_levels(tmp_path):
+    level_file = tmp_path / 'level.json'
+    level_loader.start_watching(json.dumps([[1, 0]]))
+    for text in ['{}', '{"a": 1}', '[]', '[1, 2]', '[[1, 2], [3]]', '[[1, "x"]]', '[[0, 0], [0, 0']:
+        level_file.write_text(text)
+        assert level_loader.load_changes(str(level_file)) is None, text
+    assert level_loader.loaded_level == [[1, 0]]
+
+
+def test_single_tile_reload_on_huge_level_stays_under_a_frame(tmp_path, monkeypatch):
+    new_world = make_world(tmp_path, monkeypatch)
+    level_data = [[0] * COLUMNS for _ in range(ROWS)]
+    level_data[10][5] = 1
+    write_level(level_data, 1)
+    world = new_world()
+    try:
+        level_data[10][5] = 0
+        level_data[3][3] = 2
+        write_level(level_data, 2)
+        longest_frame = run_frames(world, lambda: world.level_mtime == 2)
+        print(f'longest frame during reload: {longest_frame:.2f} ms')
+
+        assert list(world.tile_rects) == [(3, 3)]
+        assert world.world_data[3][3] == 2 and world.world_data[10][5] == 0
+        assert longest_frame < 1000 / platformer.FPS
+    finally:
+        world.loader.shutdown(cancel_futures=True)
+
+
+def test_resized_level_is_rebuilt(tmp_path, monkeypatch):
+    new_world = make_world(tmp_path, monkeypatch)
+    write_level([[1, 0], [0, 0]], 1)
+    world = new_world()
+    try:
+        write_level([[0, 0, 0], [0, 0, 0], [0, 0, 4]], 2)
+        run_frames(world, lambda: world.level_mtime == 2)
+        assert list(world.tile_rects) == [(2, 2)]
+        assert world.world_pixel_width == 3 * platformer.GRID_SIZE
+    finally:
+        world.loader.shutdown(cancel_futures=True)
+
+
+def test_fallback_floor_is_replaced_once_the_level_is_saved(tmp_path, monkeypatch):
+    new_world = make_world(tmp_path, monkeypatch)
+    world = new_world()
+    try:
+        assert len(world.tile_rects) == 50
+        write_level([[0, 0], [3, 0]], 1)
+        run_frames(world, lambda: world.level_mtime == 1)
+        assert list(world.tile_rects) == [(0, 1)]
+    finally:
+        world.loader.shutdown(cancel_futures=True)
+
+
+def test_rejected_file_is_not_reread_until_it_changes(tmp_path, monkeypatch, capsys):
+    new_world = make_world(tmp_path, monkeypatch)
+    write_level([[1, 0]], 1)
+    world = new_world()
+    try:
+        write_text('{}', 2)
+        run_frames(world, lambda: world.failed_attempts == platformer.RELOAD_RETRIES)
+        world.next_reload_check = 0
+        world.check_reload()
+        assert world.pending_load is None
+        assert capsys.readouterr().out.count('is not a valid level') == 1
+        assert list(world.tile_rects) == [(0, 0)]
+
+        write_level([[0, 1]], 3)
+        run_frames(world, lambda: world.level_mtime == 3)
+        assert list(world.tile_rects) == [(1, 0)]
+    finally:
+        world.loader.shutdown(cancel_futures=True)
+
+
+def test_save_during_a_load_is_picked_up(tmp_path, monkeypatch):
+    new_world = make_world(tmp_path, monkeypatch)
+    write_level([[0, 0]], 1)
+    world = new_world()
+    try:
+        write_level([[1, 0]], 2)
+        world.next_reload_check = 0
+        world.check_reload()
+        assert world.pending_load is not None
+        write_level([[0, 6]], 3) # Saved again while the first change is still loading
+        run_frames(world, lambda: world.level_mtime == 3)
+        assert list(world.tile_rects) == [(1, 0)]
+        assert world.world_data == [[0, 6]]
+    finally:
+        world.loader.shutdown(cancel_futures=True)